@@ -1,21 +1,33 @@
+import re
+from django.conf import settings
 from django.contrib import admin
 from .models import (
     PseudonymousUser, Project, ProjectFile, Deliverable, 
     Message, AuditLog, DownloadToken
 )
 
+PROJECT_ID_RE = re.compile(rf'^{re.escape(settings.PROJECT_ID_PREFIX)}-[A-Z0-9]{{6}}$', re.IGNORECASE)
+
 @admin.register(PseudonymousUser)
 class PseudonymousUserAdmin(admin.ModelAdmin):
     list_display = ('alias', 'email', 'is_admin', 'is_analyst', 'created_at')
     list_filter = ('is_admin', 'is_analyst', 'created_at')
-    search_fields = ('alias', 'email')
+    search_fields = ('^alias', '=email')
     readonly_fields = ('id', 'created_at', 'last_login')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Route email-looking terms to an exact match instead of scanning aliases"""
+        search_term = search_term.strip()
+        if '@' in search_term:
+            return queryset.filter(email__iexact=search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ('project_id', 'title', 'status', 'client', 'assigned_analyst', 'created_at')
+    list_select_related = ('client', 'assigned_analyst')
     list_filter = ('status', 'stage', 'support_type', 'created_at')
-    search_fields = ('project_id', 'title', 'client__alias')
+    search_fields = ('^project_id', 'title')
     readonly_fields = ('id', 'project_id', 'created_at', 'updated_at')
     fieldsets = (
         ('Project Info', {'fields': ('id', 'project_id', 'title', 'description', 'stage', 'support_type')}),
@@ -26,9 +38,25 @@ class ProjectAdmin(admin.ModelAdmin):
         ('Status', {'fields': ('status', 'created_at', 'updated_at', 'completed_at')}),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Full project IDs resolve with a single exact lookup. Other terms search
+        project fields and match client aliases through a subquery instead of a JOIN.
+        """
+        search_term = search_term.strip()
+        if PROJECT_ID_RE.match(search_term):
+            return queryset.filter(project_id__iexact=search_term), False
+
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            clients = PseudonymousUser.objects.filter(alias__istartswith=search_term).values('id')
+            results |= queryset.filter(client_id__in=clients)
+        return results, may_have_duplicates
+
 @admin.register(ProjectFile)
 class ProjectFileAdmin(admin.ModelAdmin):
     list_display = ('filename', 'project', 'file_type', 'file_size', 'uploaded_at')
+    list_select_related = ('project',)
     list_filter = ('file_type', 'uploaded_at')
     search_fields = ('filename', 'project__project_id')
     readonly_fields = ('id', 'uploaded_at')
@@ -36,6 +64,7 @@ class ProjectFileAdmin(admin.ModelAdmin):
 @admin.register(Deliverable)
 class DeliverableAdmin(admin.ModelAdmin):
     list_display = ('filename', 'project', 'deliverable_type', 'uploaded_at')
+    list_select_related = ('project',)
     list_filter = ('deliverable_type', 'uploaded_at')
     search_fields = ('filename', 'project__project_id')
     readonly_fields = ('id', 'uploaded_at')
@@ -43,6 +72,7 @@ class DeliverableAdmin(admin.ModelAdmin):
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ('project', 'sender', 'is_read', 'created_at')
+    list_select_related = ('project', 'sender')
     list_filter = ('is_read', 'created_at')
     search_fields = ('project__project_id', 'sender__alias', 'content')
     readonly_fields = ('id', 'created_at')
@@ -50,6 +80,7 @@ class MessageAdmin(admin.ModelAdmin):
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ('action', 'user', 'project', 'created_at')
+    list_select_related = ('user', 'project')
     list_filter = ('action', 'created_at')
     search_fields = ('project__project_id', 'user__alias')
     readonly_fields = ('id', 'created_at')
@@ -57,5 +88,6 @@ class AuditLogAdmin(admin.ModelAdmin):
 @admin.register(DownloadToken)
 class DownloadTokenAdmin(admin.ModelAdmin):
     list_display = ('deliverable', 'is_one_time', 'created_at', 'expires_at', 'used_at')
+    list_select_related = ('deliverable', 'deliverable__project')
     list_filter = ('is_one_time', 'created_at')
     readonly_fields = ('id', 'created_at')
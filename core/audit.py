@@ -0,0 +1,130 @@
+"""
+Background audit log writer for ShadowIQ
+Views queue AuditLog rows; one thread per process inserts them in batches
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import DatabaseError, connection, transaction
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100  # rows per INSERT
+FLUSH_INTERVAL = 5  # seconds the first queued row waits for a full batch
+
+_STOP = object()
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def enqueue_audit(**fields):
+    """
+    Queue an AuditLog row; the writer thread inserts it within FLUSH_INTERVAL.
+    created_at is the time of this call, not of the insert.
+    """
+    _queue.put(AuditLog(**fields))
+    _ensure_writer()
+
+
+def _ensure_writer():
+    """Start the writer thread on first use, or again if it has died"""
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_run, name='audit-writer', daemon=True)
+            _writer.start()
+
+
+def _next_batch():
+    """Block for one row, then collect more until BATCH_SIZE or FLUSH_INTERVAL"""
+    batch = [_queue.get()]
+    deadline = time.monotonic() + FLUSH_INTERVAL
+    while len(batch) < BATCH_SIZE and batch[-1] is not _STOP:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _write(rows):
+    if not rows:
+        return
+    try:
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    except DatabaseError:
+        # One bad row (e.g. its project was deleted meanwhile) fails the
+        # whole INSERT, so retry row by row and drop only the bad ones
+        logger.warning("Batch insert of %d audit log entries failed; retrying singly", len(rows), exc_info=True)
+        _write_singly(rows)
+    finally:
+        # This thread never sees request_finished, so recycle the
+        # connection here instead
+        connection.close_if_unusable_or_obsolete()
+
+
+def _write_singly(rows):
+    for row in rows:
+        try:
+            with transaction.atomic():
+                row.save(force_insert=True)
+        except DatabaseError:
+            logger.exception(
+                "Dropped audit log entry: action=%s user_id=%s project_id=%s created_at=%s details=%r",
+                row.action, row.user_id, row.project_id, row.created_at.isoformat(), row.details,
+            )
+
+
+def _run():
+    while True:
+        batch = _next_batch()
+        if batch[-1] is _STOP:
+            _write(batch[:-1])
+            return
+        _write(batch)
+
+
+def _drain():
+    rows = []
+    while True:
+        try:
+            row = _queue.get_nowait()
+        except queue.Empty:
+            return rows
+        if row is not _STOP:
+            rows.append(row)
+
+
+@atexit.register
+def flush_audit():
+    """Write everything still queued; runs at interpreter exit"""
+    if _writer is not None and _writer.is_alive():
+        _queue.put(_STOP)
+        _writer.join(FLUSH_INTERVAL * 2)
+    _write(_drain())
+
+
+def _reset_after_fork():
+    """Forked workers start with an empty queue and their own writer"""
+    global _queue, _writer, _writer_lock
+    _queue = queue.Queue()
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,77 +1,63 @@
-import secrets
-import string
-from datetime import timedelta
+from datetime import datetime, timedelta
+from functools import cache
+from django.core import signing
+from django.urls import reverse
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
+from .middleware import SESSION_USER_FIELDS
 from .models import PseudonymousUser
+from .tasks import send_magic_link_task
 
-def generate_magic_token():
-    """Generate a secure magic token"""
-    return secrets.token_urlsafe(32)
+MAGIC_LINK_MAX_AGE = timedelta(hours=24)
+
+# Tokens are signed, not stored: the signature carries the user id and
+# expiry, and the user's last_login at issue time makes a token single use
+# (the same scheme as Django's password reset tokens)
+_signer = signing.TimestampSigner(salt='core.auth.magic_link')
+
+def _login_stamp(last_login):
+    return last_login.isoformat() if last_login else ''
+
+def generate_magic_token(user):
+    """Generate a URL-safe magic token for user; nothing is written to the database"""
+    return _signer.sign_object([str(user.pk), _login_stamp(user.last_login)])
+
+@cache
+def _verify_path():
+    # Reversed on first use, once the URLconf is loaded, then reused
+    return reverse('core:verify_magic_link')
+
+def magic_link_url(request, token):
+    """Absolute verification link for token"""
+    return request.build_absolute_uri(f'{_verify_path()}?token={token}')
 
 def send_magic_link(user, request):
-    """Send magic link email to user"""
-    token = generate_magic_token()
-    expires = timezone.now() + timedelta(hours=24)
-    
-    user.magic_token = token
-    user.magic_token_expires = expires
-    user.save()
-    
-    # Build magic link
-    protocol = 'https' if request.is_secure() else 'http'
-    domain = request.get_host()
-    magic_link = f"{protocol}://{domain}/auth/verify/{token}/"
-    
-    # Send email
-    subject = "Your ShadowIQ Magic Link"
-    message = f"""
-    Hello {user.alias},
+    """Issue a magic token and queue the magic link email"""
+    token = generate_magic_token(user)
     
-    Click the link below to access your ShadowIQ account:
-    {magic_link}
+    magic_link = magic_link_url(request, token)
     
-    This link expires in 24 hours.
-    
-    If you didn't request this link, please ignore this email.
-    
-    Best regards,
-    ShadowIQ Team
-    """
-    
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            [user.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error sending magic link: {e}")
-        return False
+    # Send email off the request thread
+    send_magic_link_task.delay(str(user.id), magic_link)
+    return True
 
 def verify_magic_token(token):
-    """Verify magic token and return user if valid"""
+    """Verify magic token, record the login and return the user, or None if invalid"""
     try:
-        user = PseudonymousUser.objects.get(magic_token=token)
-        
-        # Check if token expired
-        if user.magic_token_expires < timezone.now():
-            return None
-        
-        # Clear token and update last login
-        user.magic_token = None
-        user.magic_token_expires = None
-        user.last_login = timezone.now()
-        user.save()
-        
-        return user
-    except PseudonymousUser.DoesNotExist:
+        user_id, stamp = _signer.unsign_object(token, max_age=MAGIC_LINK_MAX_AGE)
+        last_login = datetime.fromisoformat(stamp) if stamp else None
+    except (signing.BadSignature, ValueError, TypeError):
         return None
 
+    # Moving last_login invalidates every outstanding token for the user;
+    # matching the signed value in the WHERE clause lets only one concurrent
+    # verification of the same token win
+    now = timezone.now()
+    if not PseudonymousUser.objects.filter(pk=user_id, last_login=last_login).update(last_login=now):
+        return None
+
+    # The same columns the middleware loads, so the caller can cache this row
+    return PseudonymousUser.objects.only(*SESSION_USER_FIELDS).get(pk=user_id)
+
 def get_or_create_pseudonymous_user(alias, email=None):
     """Get or create a pseudonymous user"""
     user, created = PseudonymousUser.objects.get_or_create(
@@ -3,10 +3,13 @@ Chatbot logic for client-admin communication
 Handles inquiry routing, pricing negotiation, and project clarification
 """
 
+import textwrap
+from functools import lru_cache
+
 class ChatbotResponses:
     """Predefined chatbot responses for common inquiries"""
     
-    GREETING = """
+    GREETING = textwrap.dedent("""
     Hello! I'm the ShadowIQ assistant. I'm here to help you with your research project.
     
     How can I assist you today? You can ask about:
@@ -15,9 +18,9 @@ class ChatbotResponses:
     - Data requirements
     - Deliverables and reproducibility
     - General questions about our process
-    """
+    """).strip()
     
-    PRICING_INQUIRY = """
+    PRICING_INQUIRY = textwrap.dedent("""
     Great question about pricing! Our rates depend on the complexity and scope of your project.
     
     Typical pricing ranges:
@@ -32,18 +35,18 @@ class ChatbotResponses:
     3. What's your timeline?
     
     Would you like to discuss your specific project needs?
-    """
+    """).strip()
     
-    TIMELINE_INQUIRY = """
+    TIMELINE_INQUIRY = textwrap.dedent("""
     Our typical timelines are:
     - Simple analyses: 3-5 business days
     - Standard projects: 1-2 weeks
     - Complex projects: 2-4 weeks
     
     Rush projects may be available at a premium rate. What's your deadline?
-    """
+    """).strip()
     
-    DELIVERABLES_INFO = """
+    DELIVERABLES_INFO = textwrap.dedent("""
     Every ShadowIQ project includes:
     
     1. **PDF Report** - Clear methods, results, interpretation, and limitations
@@ -54,9 +57,9 @@ class ChatbotResponses:
     6. **Statement of Work** - Signed contract with scope and terms
     
     All deliverables are designed for reproducibility and verification.
-    """
+    """).strip()
     
-    DATA_REQUIREMENTS = """
+    DATA_REQUIREMENTS = textwrap.dedent("""
     Data requirements depend on your analysis type:
     
     **Accepted formats:**
@@ -74,9 +77,9 @@ class ChatbotResponses:
     **Maximum file size:** 500 MB for MVP
     
     Do you have questions about preparing your data?
-    """
+    """).strip()
     
-    COMPLIANCE_INFO = """
+    COMPLIANCE_INFO = textwrap.dedent("""
     ShadowIQ takes compliance seriously:
     
     ✓ **Privacy First** - Minimal PII storage, pseudonymous accounts
@@ -86,9 +89,9 @@ class ChatbotResponses:
     ✓ **Audit Trails** - Complete logging for accountability
     
     All projects must comply with our Acceptable Use Policy. Do you have specific compliance questions?
-    """
+    """).strip()
     
-    NEXT_STEPS = """
+    NEXT_STEPS = textwrap.dedent("""
     Here's how to move forward:
     
     1. **Submit Your Project** - Fill out our intake form with project details
@@ -101,21 +104,23 @@ class ChatbotResponses:
     8. **Delivery** - Download your complete deliverable package
     
     Ready to submit your project?
-    """
+    """).strip()
     
     @staticmethod
     def get_response(inquiry_type):
         """Get chatbot response based on inquiry type"""
-        responses = {
-            'greeting': ChatbotResponses.GREETING,
-            'pricing': ChatbotResponses.PRICING_INQUIRY,
-            'timeline': ChatbotResponses.TIMELINE_INQUIRY,
-            'deliverables': ChatbotResponses.DELIVERABLES_INFO,
-            'data': ChatbotResponses.DATA_REQUIREMENTS,
-            'compliance': ChatbotResponses.COMPLIANCE_INFO,
-            'next_steps': ChatbotResponses.NEXT_STEPS,
-        }
-        return responses.get(inquiry_type, ChatbotResponses.GREETING)
+        return _RESPONSES.get(inquiry_type, ChatbotResponses.GREETING)
+
+# Built once at import; responses are constants
+_RESPONSES = {
+    'greeting': ChatbotResponses.GREETING,
+    'pricing': ChatbotResponses.PRICING_INQUIRY,
+    'timeline': ChatbotResponses.TIMELINE_INQUIRY,
+    'deliverables': ChatbotResponses.DELIVERABLES_INFO,
+    'data': ChatbotResponses.DATA_REQUIREMENTS,
+    'compliance': ChatbotResponses.COMPLIANCE_INFO,
+    'next_steps': ChatbotResponses.NEXT_STEPS,
+}
 
 class InquiryClassifier:
     """Classify user inquiries to route to appropriate responses"""
@@ -129,14 +134,26 @@ class InquiryClassifier:
         'next_steps': ['next', 'how do i', 'process', 'submit', 'start', 'begin'],
     }
     
+    # Flattened once at import, in KEYWORDS order so earlier categories win.
+    # str.__contains__ is a C-level substring search and outruns a compiled
+    # alternation or tokenising the message on both short and long inputs.
+    KEYWORD_INDEX = tuple(
+        (keyword, category)
+        for category, keywords in KEYWORDS.items()
+        for keyword in keywords
+    )
+    
     @staticmethod
     def classify(message):
         """Classify inquiry and return category"""
-        message_lower = message.lower()
-        
-        for category, keywords in InquiryClassifier.KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    return category
-        
-        return 'greeting'
+        return _classify_cached(message.lower())
+
+
+@lru_cache(maxsize=1024)
+def _classify_cached(message_lower):
+    """Classification is a pure function of the message, so repeats are memoized"""
+    for keyword, category in InquiryClassifier.KEYWORD_INDEX:
+        if keyword in message_lower:
+            return category
+    
+    return 'greeting'
@@ -1,7 +1,15 @@
+import re
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.core.exceptions import ValidationError
+from django.utils.functional import SimpleLazyObject
 from django.shortcuts import redirect
 from django.http import HttpResponseForbidden
-from django.contrib.auth.models import AnonymousUser
-from .models import PseudonymousUser, Project, AuditLog
+from .audit import enqueue_audit
+from .models import AuditAction, Project
 
 
 def get_client_ip(request):
@@ -14,199 +22,258 @@ def get_client_ip(request):
     return ip
 
 
-def _get_user(request):
+def _log_denial(request, user, action, details, project_id=None):
+    """Queue an audit entry for a denied request without blocking the response"""
+    enqueue_audit(
+        user=user,
+        project_id=project_id,
+        action=action,
+        details=details,
+        ip_address=get_client_ip(request),
+    )
+
+
+def _get_project_row(request, project_id):
     """
-    Safe helper to retrieve the user object.
-    Always returns either a PseudonymousUser instance or None.
+    Access-check columns for a project, memoized on the request so stacked
+    project decorators share one query. None if the project does not exist.
     """
-    user = getattr(request, 'user', None)
-    if isinstance(user, AnonymousUser) or user is None:
-        return None
-    return user
+    rows = request.__dict__.setdefault('_cached_project_rows', {})
+    if project_id not in rows:
+        rows[project_id] = (
+            Project.objects.filter(id=project_id)
+            .values('id', 'client_id', 'assigned_analyst_id')
+            .first()
+        )
+    return rows[project_id]
 
 
-def pseudonymous_user_required(view_func):
-    """Ensure pseudonymous session is active before allowing access"""
-    def wrapper(request, *args, **kwargs):
-        user_id = request.session.get('pseudonymous_user_id')
-        if not user_id:
-            return redirect('core:request_magic_link')
+def _attach_project(request, project_id):
+    """Expose the project to the view, loaded only if the view touches it"""
+    if getattr(request, 'project_id', None) == project_id:
+        return
+    request.project_id = project_id
+    request.project = SimpleLazyObject(
+        lambda: Project.objects.select_related('client', 'assigned_analyst').get(id=project_id)
+    )
 
-        try:
-            user = PseudonymousUser.objects.get(id=user_id)
-        except PseudonymousUser.DoesNotExist:
-            request.session.pop('pseudonymous_user_id', None)
-            return redirect('core:request_magic_link')
 
-        # Attach pseudonymous user to request
-        request.user = user
-        return view_func(request, *args, **kwargs)
-    return wrapper
+_HEX32 = re.compile(r'\A[0-9a-fA-F]{32}\Z')
 
 
-def admin_required(view_func):
-    """Require pseudonymous user with is_admin=True"""
-    def wrapper(request, *args, **kwargs):
-        user = _get_user(request)
-        if not user:
-            return redirect('core:request_magic_link')
+def _parse_uuid(value):
+    """
+    Parse a project UUID from a URL kwarg. Accepts UUID instances (from a
+    <uuid:> converter) and skips uuid.UUID's string normalisation for bare
+    32-hex ids. Raises ValueError/AttributeError like uuid.UUID.
+    """
+    if isinstance(value, uuid.UUID):
+        return value
+    if _HEX32.match(value):
+        return uuid.UUID(bytes=bytes.fromhex(value))
+    return uuid.UUID(value)
 
-        if not getattr(user, 'is_admin', False):
-            AuditLog.objects.create(
-                user=user,
-                action='unauthorized_access',
-                details={
-                    'view_name': view_func.__name__,
-                    'required_role': 'admin',
-                    'user_has_admin': getattr(user, 'is_admin', None)
-                },
-                ip_address=get_client_ip(request)
-            )
-            return HttpResponseForbidden("Admin access required")
 
-        return view_func(request, *args, **kwargs)
-    return wrapper
+_FORBIDDEN_BODIES = {}
 
 
-def analyst_required(view_func):
-    """Require pseudonymous user with is_analyst=True"""
-    def wrapper(request, *args, **kwargs):
-        user = _get_user(request)
-        if not user:
-            return redirect('core:request_magic_link')
+def _forbidden(message):
+    """
+    403 response for a static denial message. The encoded body is cached per
+    message; the response itself is always new, since middleware sets
+    cookies and headers on it.
+    """
+    body = _FORBIDDEN_BODIES.get(message)
+    if body is None:
+        body = _FORBIDDEN_BODIES[message] = message.encode()
+    return HttpResponseForbidden(body)
 
-        if not getattr(user, 'is_analyst', False):
-            AuditLog.objects.create(
-                user=user,
-                action='unauthorized_access',
-                details={
-                    'view_name': view_func.__name__,
-                    'required_role': 'analyst',
-                    'user_has_analyst': getattr(user, 'is_analyst', None)
-                },
-                ip_address=get_client_ip(request)
-            )
-            return HttpResponseForbidden("Analyst access required")
 
-        return view_func(request, *args, **kwargs)
-    return wrapper
+_UNSET = object()
+
+
+def _get_user(request):
+    """
+    Safe helper to retrieve the user object.
+    Always returns either a PseudonymousUser instance or None.
+    Memoized on the request for stacked decorators.
+    """
+    user = request.__dict__.get('_cached_pseudo_user', _UNSET)
+    if user is not _UNSET:
+        return user
+
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        user = None
+    request._cached_pseudo_user = user
+    return user
 
 
-def client_required(view_func):
-    """Require pseudonymous user who is NOT admin or analyst"""
+def pseudonymous_user_required(view_func):
+    """Ensure pseudonymous session is active before allowing access"""
+    # PseudonymousAuthMiddleware has already resolved the session user
+    # (and dropped stale session ids), so there is nothing to refetch
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if not _get_user(request):
+                return redirect('core:request_magic_link')
+            return await view_func(request, *args, **kwargs)
+        return wrapper
+
+    @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        user = _get_user(request)
-        if not user:
+        if not _get_user(request):
             return redirect('core:request_magic_link')
 
-        if getattr(user, 'is_admin', False) or getattr(user, 'is_analyst', False):
-            AuditLog.objects.create(
-                user=user,
-                action='unauthorized_access',
-                details={
-                    'view_name': view_func.__name__,
-                    'required_role': 'client',
-                    'user_is_admin': getattr(user, 'is_admin', None),
-                    'user_is_analyst': getattr(user, 'is_analyst', None)
-                },
-                ip_address=get_client_ip(request)
-            )
-            return HttpResponseForbidden("Client access only")
-
         return view_func(request, *args, **kwargs)
     return wrapper
 
 
+def role_required(*, role, has_role, flags, denied_message):
+    """
+    Build a decorator that requires a pseudonymous user passing has_role.
+    Denials are audited with the user's role flags, named by `flags`
+    (audit detail key -> user attribute). Works on sync and async views.
+    """
+    def decorator(view_func):
+        def check(request):
+            """(response, denial details); response is None if the user may proceed"""
+            user = _get_user(request)
+            if not user:
+                return redirect('core:request_magic_link'), None
+
+            if has_role(user):
+                return None, None
+
+            details = {'view_name': view_func.__name__, 'required_role': role}
+            for key, attr in flags.items():
+                details[key] = getattr(user, attr, None)
+            return _forbidden(denied_message), details
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                response, details = check(request)
+                if details is not None:
+                    _log_denial(request, _get_user(request), AuditAction.UNAUTHORIZED_ACCESS, details)
+                if response is not None:
+                    return response
+                return await view_func(request, *args, **kwargs)
+            return wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response, details = check(request)
+            if details is not None:
+                _log_denial(request, _get_user(request), AuditAction.UNAUTHORIZED_ACCESS, details)
+            if response is not None:
+                return response
+
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Require pseudonymous user with is_admin=True
+admin_required = role_required(
+    role='admin',
+    has_role=lambda user: getattr(user, 'is_admin', False),
+    flags={'user_has_admin': 'is_admin'},
+    denied_message="Admin access required",
+)
+
+# Require pseudonymous user with is_analyst=True
+analyst_required = role_required(
+    role='analyst',
+    has_role=lambda user: getattr(user, 'is_analyst', False),
+    flags={'user_has_analyst': 'is_analyst'},
+    denied_message="Analyst access required",
+)
+
+# Require pseudonymous user who is NOT admin or analyst
+client_required = role_required(
+    role='client',
+    has_role=lambda user: not (getattr(user, 'is_admin', False) or getattr(user, 'is_analyst', False)),
+    flags={'user_is_admin': 'is_admin', 'user_is_analyst': 'is_analyst'},
+    denied_message="Client access only",
+)
+
+
 def project_access_required(view_func):
     """Ensure pseudonymous user has access to the given project"""
+    @wraps(view_func)
     def wrapper(request, project_id, *args, **kwargs):
         user = _get_user(request)
         if not user:
             return redirect('core:request_magic_link')
 
         try:
-            from django.core.exceptions import ValidationError
-            import uuid
-
             try:
-                project_id = uuid.UUID(project_id)
-            except (ValueError, AttributeError):
-                return HttpResponseForbidden("Invalid project ID")
+                project_id = _parse_uuid(project_id)
+            except (ValueError, TypeError, AttributeError):
+                return _forbidden("Invalid project ID")
 
-            project = Project.objects.get(id=project_id)
+            project = _get_project_row(request, project_id)
+            if project is None:
+                return _forbidden("Project not found")
 
             has_access = (
-                project.client == user or
+                project['client_id'] == user.id or
                 getattr(user, 'is_admin', False) or
                 getattr(user, 'is_analyst', False)
             )
 
             if not has_access:
-                AuditLog.objects.create(
-                    user=user,
-                    project=project,
-                    action='unauthorized_project_access',
-                    details={
-                        'project_id': str(project.id),
-                        'project_client': str(project.client.id),
-                        'attempted_user': str(user.id)
-                    },
-                    ip_address=get_client_ip(request)
-                )
-                return HttpResponseForbidden("Project access denied")
-
-        except Project.DoesNotExist:
-            return HttpResponseForbidden("Project not found")
+                _log_denial(request, user, AuditAction.UNAUTHORIZED_PROJECT_ACCESS, {
+                    'project_id': str(project['id']),
+                    'project_client': str(project['client_id']),
+                    'attempted_user': str(user.id)
+                }, project_id=project['id'])
+                return _forbidden("Project access denied")
+
         except ValidationError as e:
             return HttpResponseForbidden(f"Invalid project ID: {e}")
 
-        request.project = project
+        _attach_project(request, project['id'])
         return view_func(request, *args, **kwargs)
     return wrapper
 
 
 def analyst_project_access_required(view_func):
     """Require pseudonymous user to be assigned analyst for project or admin"""
+    @wraps(view_func)
     def wrapper(request, project_id, *args, **kwargs):
         user = _get_user(request)
         if not user:
             return redirect('core:request_magic_link')
 
         if not getattr(user, 'is_analyst', False) and not getattr(user, 'is_admin', False):
-            return HttpResponseForbidden("Analyst or admin access required")
+            return _forbidden("Analyst or admin access required")
 
         try:
-            import uuid
-            try:
-                project_id = uuid.UUID(project_id)
-            except (ValueError, AttributeError):
-                return HttpResponseForbidden("Invalid project ID")
-
-            project = Project.objects.get(id=project_id)
-
-            has_access = (
-                project.assigned_analyst == user or
-                getattr(user, 'is_admin', False)
-            )
-
-            if not has_access:
-                AuditLog.objects.create(
-                    user=user,
-                    project=project,
-                    action='unauthorized_analyst_access',
-                    details={
-                        'project_id': str(project.id),
-                        'assigned_analyst': str(project.assigned_analyst.id)
-                        if project.assigned_analyst else None,
-                        'attempted_analyst': str(user.id)
-                    },
-                    ip_address=get_client_ip(request)
-                )
-                return HttpResponseForbidden("Not assigned to this project")
-
-        except Project.DoesNotExist:
-            return HttpResponseForbidden("Project not found")
-
-        request.project = project
+            project_id = _parse_uuid(project_id)
+        except (ValueError, TypeError, AttributeError):
+            return _forbidden("Invalid project ID")
+
+        project = _get_project_row(request, project_id)
+        if project is None:
+            return _forbidden("Project not found")
+
+        has_access = (
+            project['assigned_analyst_id'] == user.id or
+            getattr(user, 'is_admin', False)
+        )
+
+        if not has_access:
+            _log_denial(request, user, AuditAction.UNAUTHORIZED_ANALYST_ACCESS, {
+                'project_id': str(project['id']),
+                'assigned_analyst': str(project['assigned_analyst_id'])
+                if project['assigned_analyst_id'] else None,
+                'attempted_analyst': str(user.id)
+            }, project_id=project['id'])
+            return _forbidden("Not assigned to this project")
+
+        _attach_project(request, project['id'])
         return view_func(request, *args, **kwargs)
     return wrapper
@@ -0,0 +1,10 @@
+import json
+
+import orjson
+
+
+class OrjsonEncoder(json.JSONEncoder):
+    """JSONField encoder that serializes with orjson's C implementation"""
+
+    def encode(self, o):
+        return orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS).decode()
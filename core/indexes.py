@@ -0,0 +1,42 @@
+"""
+Portable index types for ShadowIQ
+PostgreSQL index methods in production, plain btree indexes on SQLite
+"""
+
+from django.contrib.postgres import indexes as postgres_indexes
+from django.contrib.postgres.indexes import OpClass
+from django.db.models import Index
+
+
+class PortableIndexMixin:
+    """
+    Build the PostgreSQL index on PostgreSQL and an equivalent btree index
+    (same name, columns and condition, no operator classes) elsewhere, so
+    the development database can still create and rebuild tables.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        return self.btree_fallback().create_sql(model, schema_editor, **kwargs)
+
+    def btree_fallback(self):
+        expressions = [
+            expression.source_expressions[0] if isinstance(expression, OpClass) else expression
+            for expression in self.expressions
+        ]
+        return Index(
+            *expressions,
+            fields=[] if expressions else list(self.fields),
+            name=self.name,
+            condition=self.condition,
+            include=self.include,
+        )
+
+
+class GinIndex(PortableIndexMixin, postgres_indexes.GinIndex):
+    pass
+
+
+class BrinIndex(PortableIndexMixin, postgres_indexes.BrinIndex):
+    pass
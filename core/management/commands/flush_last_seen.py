@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.presence import flush_last_seen
+
+
+class Command(BaseCommand):
+    help = "Write queued last_seen timestamps to the database (run every minute)"
+
+    def handle(self, *args, **options):
+        flushed = flush_last_seen()
+        self.stdout.write(f"Flushed last_seen for {flushed} user(s)")
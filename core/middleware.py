@@ -1,29 +1,86 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.models import AnonymousUser
 from .models import PseudonymousUser
+from .presence import arecord_last_seen, record_last_seen
+
+
+# Columns read from request.user downstream
+SESSION_USER_FIELDS = ('id', 'alias', 'email', 'is_admin', 'is_analyst')
+
+
+def user_cache_key(user_id):
+    """Cache key for a session's PseudonymousUser"""
+    return f'pseuser:{user_id}'
+
+
+def last_seen_cache_key(user_id):
+    """Cache key marking a recent last_seen write"""
+    return f'pseuser:seen:{user_id}'
+
 
 class PseudonymousAuthMiddleware:
     """Middleware to attach pseudonymous user from session to the request."""
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         user = None
         user_id = request.session.get('pseudonymous_user_id')
 
         if user_id:
-            try:
-                user = PseudonymousUser.objects.get(id=user_id)
-                # Update last seen timestamp
+            key = user_cache_key(user_id)
+            user = cache.get(key)
+            if user is None:
+                try:
+                    user = PseudonymousUser.objects.only(*SESSION_USER_FIELDS).get(id=user_id)
+                    cache.set(key, user, settings.USER_CACHE_TTL)
+                except PseudonymousUser.DoesNotExist:
+                    # Session refers to invalid user — clear it
+                    request.session.pop('pseudonymous_user_id', None)
+
+            if user and cache.add(last_seen_cache_key(user_id), True, settings.LAST_SEEN_INTERVAL):
+                # Queue the last seen timestamp at most once per interval; the
+                # flush_last_seen command writes it without touching post_save
                 user.last_seen = timezone.now()
-                user.save(update_fields=['last_seen'])
-            except PseudonymousUser.DoesNotExist:
-                # Session refers to invalid user — clear it
-                request.session.pop('pseudonymous_user_id', None)
+                record_last_seen(user.pk)
 
         # Always assign a valid user-like object to request.user
         request.user = user if user else AnonymousUser()
 
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request):
+        """Same as __call__, without leaving the event loop under ASGI"""
+        user = None
+        user_id = await request.session.aget('pseudonymous_user_id')
+
+        if user_id:
+            key = user_cache_key(user_id)
+            user = await cache.aget(key)
+            if user is None:
+                try:
+                    user = await PseudonymousUser.objects.only(*SESSION_USER_FIELDS).aget(id=user_id)
+                    await cache.aset(key, user, settings.USER_CACHE_TTL)
+                except PseudonymousUser.DoesNotExist:
+                    await request.session.apop('pseudonymous_user_id', None)
+
+            if user and await cache.aadd(last_seen_cache_key(user_id), True, settings.LAST_SEEN_INTERVAL):
+                user.last_seen = timezone.now()
+                await arecord_last_seen(user.pk)
+
+        request.user = user if user else AnonymousUser()
+
+        return await self.get_response(request)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-14 10:58
+
+import core.indexes
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+from core.operations import AddIndexConcurrently, TrigramExtension
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_pseudonymoususer_last_seen'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='project',
+            index=core.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('project_id'), name='gin_trgm_ops'), name='core_project_pid_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=core.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='core_project_title_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='pseudonymoususer',
+            index=core.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('alias'), name='gin_trgm_ops'), name='core_user_alias_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='pseudonymoususer',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='core_user_email_upper_idx'),
+        ),
+    ]
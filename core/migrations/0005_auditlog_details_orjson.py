@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:05
+
+import core.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='details',
+            field=models.JSONField(default=dict, encoder=core.encoders.OrjsonEncoder),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:06
+
+from django.db import migrations, models
+
+
+def clear_magic_tokens(apps, schema_editor):
+    # Outstanding text tokens cannot be converted to the new raw form
+    PseudonymousUser = apps.get_model('core', 'PseudonymousUser')
+    PseudonymousUser.objects.exclude(magic_token=None).update(magic_token=None, magic_token_expires=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auditlog_details_orjson'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_magic_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pseudonymoususer',
+            name='magic_token',
+            field=models.BinaryField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
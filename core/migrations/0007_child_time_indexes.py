@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:12
+
+import core.indexes
+from django.db import migrations, models
+
+from core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_binary_magic_token'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='auditlog',
+            index=models.Index(fields=['project', '-created_at'], name='core_audit_project_time'),
+        ),
+        AddIndexConcurrently(
+            model_name='auditlog',
+            index=core.indexes.BrinIndex(fields=['created_at'], name='core_audit_created_brin'),
+        ),
+        AddIndexConcurrently(
+            model_name='deliverable',
+            index=models.Index(fields=['project', '-uploaded_at'], name='core_deliv_project_time'),
+        ),
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(fields=['project', 'created_at'], name='core_msg_project_time'),
+        ),
+        AddIndexConcurrently(
+            model_name='projectfile',
+            index=models.Index(fields=['project', '-uploaded_at'], name='core_file_project_time'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_client_alias(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    PseudonymousUser = apps.get_model('core', 'PseudonymousUser')
+    Project.objects.update(client_alias=Subquery(
+        PseudonymousUser.objects.filter(pk=OuterRef('client_id')).values('alias')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_project_stripe_pi_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='client_alias',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_client_alias, migrations.RunPython.noop),
+    ]
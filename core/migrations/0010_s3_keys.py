@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_project_client_alias'),
+    ]
+
+    operations = [
+        # Existing FileField names are kept as the object key
+        migrations.RenameField(
+            model_name='projectfile',
+            old_name='file',
+            new_name='s3_key',
+        ),
+        migrations.AlterField(
+            model_name='projectfile',
+            name='s3_key',
+            field=models.CharField(db_index=True, max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='projectfile',
+            name='etag',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='projectfile',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='projectfile',
+            name='file_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.RenameField(
+            model_name='deliverable',
+            old_name='file',
+            new_name='s3_key',
+        ),
+        migrations.AlterField(
+            model_name='deliverable',
+            name='s3_key',
+            field=models.CharField(db_index=True, max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='deliverable',
+            name='etag',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_s3_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectfile',
+            name='is_clean',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:23
+
+import core.indexes
+from django.db import migrations
+
+from core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_time_ordered_ids'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='auditlog',
+            index=core.indexes.GinIndex(fields=['details'], name='core_audit_details_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
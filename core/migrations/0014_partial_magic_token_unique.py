@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_auditlog_details_gin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pseudonymoususer',
+            name='magic_token',
+            field=models.BinaryField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='pseudonymoususer',
+            constraint=models.UniqueConstraint(condition=models.Q(('magic_token__isnull', False)), fields=('magic_token',), name='core_user_magic_token_unique'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-14 12:10
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# Frozen copies of ProjectStatus and AuditAction at the time of this migration
+STATUSES = {
+    'submitted': 1,
+    'accepted': 2,
+    'in_progress': 3,
+    'qa': 4,
+    'completed': 5,
+    'rejected': 6,
+    'disputed': 7,
+}
+
+ACTIONS = {
+    'project_submitted': 1,
+    'project_accepted': 2,
+    'status_changed': 3,
+    'file_uploaded': 4,
+    'file_downloaded': 5,
+    'deliverable_uploaded': 6,
+    'payment_processed': 7,
+    'message_sent': 8,
+    'project_rejected': 9,
+    'dispute_filed': 10,
+    'payout_released': 11,
+    'payment_refunded': 12,
+    'magic_link_requested': 13,
+    'user_logged_in': 14,
+    'user_logged_out': 15,
+    'unauthorized_access': 16,
+    'unauthorized_project_access': 17,
+    'unauthorized_analyst_access': 18,
+}
+
+
+def remap(model, field, mapping, default):
+    """Rewrite every value of a text column in one UPDATE"""
+    model.objects.update(**{field: Case(
+        *(When(**{field: old}, then=Value(new)) for old, new in mapping.items()),
+        default=Value(default),
+    )})
+
+
+def strings_to_numbers(apps, schema_editor):
+    remap(apps.get_model('core', 'Project'), 'status',
+          {name: str(number) for name, number in STATUSES.items()}, str(STATUSES['submitted']))
+    remap(apps.get_model('core', 'AuditLog'), 'action',
+          {name: str(number) for name, number in ACTIONS.items()}, '0')
+
+
+def numbers_to_strings(apps, schema_editor):
+    remap(apps.get_model('core', 'Project'), 'status',
+          {str(number): name for name, number in STATUSES.items()}, 'submitted')
+    remap(apps.get_model('core', 'AuditLog'), 'action',
+          {str(number): name for name, number in ACTIONS.items()}, 'status_changed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_partial_magic_token_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(strings_to_numbers, numbers_to_strings),
+        migrations.AlterField(
+            model_name='project',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Submitted'), (2, 'Accepted'), (3, 'In Progress'), (4, 'QA Review'), (5, 'Completed'), (6, 'Rejected'), (7, 'Disputed')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Project Submitted'), (2, 'Project Accepted'), (3, 'Status Changed'), (4, 'File Uploaded'), (5, 'File Downloaded'), (6, 'Deliverable Uploaded'), (7, 'Payment Processed'), (8, 'Message Sent'), (9, 'Project Rejected'), (10, 'Dispute Filed'), (11, 'Payout Released'), (12, 'Payment Refunded'), (13, 'Magic Link Requested'), (14, 'User Logged In'), (15, 'User Logged Out'), (16, 'Unauthorized Access'), (17, 'Unauthorized Project Access'), (18, 'Unauthorized Analyst Access')]),
+        ),
+    ]
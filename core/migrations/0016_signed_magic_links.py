@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_integer_choices'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='pseudonymoususer',
+            name='core_user_magic_token_unique',
+        ),
+        migrations.RemoveField(
+            model_name='pseudonymoususer',
+            name='magic_token',
+        ),
+        migrations.RemoveField(
+            model_name='pseudonymoususer',
+            name='magic_token_expires',
+        ),
+    ]
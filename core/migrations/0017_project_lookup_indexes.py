@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:46
+
+from django.db import migrations, models
+
+from core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0016_signed_magic_links'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['project_id', 'client'], name='core_project_pid_client'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['client', '-created_at'], name='core_project_client_time'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['assigned_analyst', '-created_at'], name='core_project_analyst_time'),
+        ),
+    ]
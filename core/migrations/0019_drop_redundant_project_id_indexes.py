@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-14 11:53
+
+from django.db import migrations
+
+from core.operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0018_auditlog_created_at_default'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name='project',
+            name='core_projec_project_96ab66_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='project',
+            name='core_project_pid_client',
+        ),
+    ]
@@ -1,19 +1,22 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import OpClass
 from django.utils import timezone
-from django.contrib.postgres.fields import ArrayField
+import base64
 import uuid
 import secrets
-import string
+
+from uuid6 import uuid7
+
+from .encoders import OrjsonEncoder
+from .indexes import BrinIndex, GinIndex
 
 def generate_project_id():
     """Generate unique project ID in format SIQ-XXXXXX"""
-    try:
-        from django.conf import settings
-        prefix = getattr(settings, 'PROJECT_ID_PREFIX', 'SIQ')
-    except:
-        prefix = 'SIQ'
-    
-    random_part = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(6))
+    prefix = getattr(settings, 'PROJECT_ID_PREFIX', 'SIQ')
+    # Six base32 characters (A-Z, 2-7) from one urandom read
+    random_part = base64.b32encode(secrets.token_bytes(4))[:6].decode('ascii')
     return f"{prefix}-{random_part}"
 
 class PseudonymousUser(models.Model):
@@ -21,19 +24,31 @@ class PseudonymousUser(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     alias = models.CharField(max_length=255, unique=True)
     email = models.EmailField(null=True, blank=True)  # Optional
-    magic_token = models.CharField(max_length=255, unique=True, null=True, blank=True)
-    magic_token_expires = models.DateTimeField(null=True, blank=True)
     is_admin = models.BooleanField(default=False)
     is_analyst = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    last_login = models.DateTimeField(null=True, blank=True)
+    last_login = models.DateTimeField(null=True, blank=True)  # also invalidates used magic links
     last_seen = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin search uses UPPER(...) LIKE, so index the same expressions
+            GinIndex(OpClass(Upper('alias'), name='gin_trgm_ops'), name='core_user_alias_trgm'),
+            models.Index(Upper('email'), name='core_user_email_upper_idx'),
+        ]
     
     def __str__(self):
         return self.alias
+
+    @property
+    def is_authenticated(self):
+        """Always True, matching django.contrib.auth users; AnonymousUser is False"""
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
 class AuthToken(models.Model):
     user = models.ForeignKey('PseudonymousUser', on_delete=models.CASCADE)
     token = models.CharField(max_length=128, unique=True, default=uuid.uuid4)
@@ -48,17 +63,66 @@ class AuthToken(models.Model):
     def __str__(self):
         return f"AuthToken for {self.user} (expires {self.expires_at})"
 
+class ProjectStatus(models.IntegerChoices):
+    """Project.status, stored as a smallint"""
+    SUBMITTED = 1, 'Submitted'
+    ACCEPTED = 2, 'Accepted'
+    IN_PROGRESS = 3, 'In Progress'
+    QA = 4, 'QA Review'
+    COMPLETED = 5, 'Completed'
+    REJECTED = 6, 'Rejected'
+    DISPUTED = 7, 'Disputed'
+
+class AuditAction(models.IntegerChoices):
+    """AuditLog.action, stored as a smallint; values are never reused"""
+    OTHER = 0, 'Other'  # rows migrated from an unrecognised action string
+    PROJECT_SUBMITTED = 1, 'Project Submitted'
+    PROJECT_ACCEPTED = 2, 'Project Accepted'
+    STATUS_CHANGED = 3, 'Status Changed'
+    FILE_UPLOADED = 4, 'File Uploaded'
+    FILE_DOWNLOADED = 5, 'File Downloaded'
+    DELIVERABLE_UPLOADED = 6, 'Deliverable Uploaded'
+    PAYMENT_PROCESSED = 7, 'Payment Processed'
+    MESSAGE_SENT = 8, 'Message Sent'
+    PROJECT_REJECTED = 9, 'Project Rejected'
+    DISPUTE_FILED = 10, 'Dispute Filed'
+    PAYOUT_RELEASED = 11, 'Payout Released'
+    PAYMENT_REFUNDED = 12, 'Payment Refunded'
+    MAGIC_LINK_REQUESTED = 13, 'Magic Link Requested'
+    USER_LOGGED_IN = 14, 'User Logged In'
+    USER_LOGGED_OUT = 15, 'User Logged Out'
+    UNAUTHORIZED_ACCESS = 16, 'Unauthorized Access'
+    UNAUTHORIZED_PROJECT_ACCESS = 17, 'Unauthorized Project Access'
+    UNAUTHORIZED_ANALYST_ACCESS = 18, 'Unauthorized Analyst Access'
+
+class ProjectQuerySet(models.QuerySet):
+    """Project queries with the related rows views usually need"""
+
+    def with_people(self):
+        """Join the client and assigned analyst instead of a query per access"""
+        return self.select_related('client', 'assigned_analyst')
+
+    def with_files(self):
+        """Prefetch files and deliverables with just their listing columns"""
+        return self.prefetch_related(
+            models.Prefetch(
+                'files',
+                queryset=ProjectFile.objects.only(
+                    'id', 'project_id', 'filename', 'file_size', 'uploaded_at'
+                ),
+            ),
+            models.Prefetch(
+                'deliverables',
+                queryset=Deliverable.objects.only(
+                    'id', 'project_id', 'deliverable_type', 'filename', 'description', 'uploaded_at'
+                ),
+            ),
+        )
+
 class Project(models.Model):
     """Research project submission"""
-    STATUS_CHOICES = [
-        ('submitted', 'Submitted'),
-        ('accepted', 'Accepted'),
-        ('in_progress', 'In Progress'),
-        ('qa', 'QA Review'),
-        ('completed', 'Completed'),
-        ('rejected', 'Rejected'),
-        ('disputed', 'Disputed'),
-    ]
+    Status = ProjectStatus
+    STATUS_CHOICES = ProjectStatus.choices
     
     STAGE_CHOICES = [
         ('proposal', 'Proposal'),
@@ -82,6 +146,8 @@ class Project(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project_id = models.CharField(max_length=20, unique=True, default=generate_project_id)
     client = models.ForeignKey(PseudonymousUser, on_delete=models.PROTECT, related_name='projects')
+    # Copy of client.alias for listings, kept in sync by core.signals
+    client_alias = models.CharField(max_length=255, blank=True, editable=False)
     assigned_analyst = models.ForeignKey(PseudonymousUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_projects')
     
     title = models.CharField(max_length=500)
@@ -95,7 +161,7 @@ class Project(models.Model):
     deadline = models.DateField(null=True, blank=True)
     budget_range = models.CharField(max_length=100, null=True, blank=True)
     
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted')
+    status = models.PositiveSmallIntegerField(choices=ProjectStatus.choices, default=ProjectStatus.SUBMITTED)
     
     # Compliance & Ethics
     confirms_lawful_use = models.BooleanField(default=False)
@@ -117,30 +183,54 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['project_id']),
             models.Index(fields=['client', 'status']),
             models.Index(fields=['status']),
+            # Dashboard listings, already in -created_at order
+            models.Index(fields=['client', '-created_at'], name='core_project_client_time'),
+            models.Index(fields=['assigned_analyst', '-created_at'], name='core_project_analyst_time'),
+            # Most projects have no PaymentIntent yet; index only those that do
+            models.Index(
+                fields=['stripe_payment_intent_id'],
+                condition=models.Q(stripe_payment_intent_id__isnull=False),
+                name='core_project_stripe_pi',
+            ),
+            GinIndex(OpClass(Upper('project_id'), name='gin_trgm_ops'), name='core_project_pid_trgm'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='core_project_title_trgm'),
         ]
     
     def __str__(self):
         return f"{self.project_id} - {self.title}"
 
+    @property
+    def status_key(self):
+        """Lowercase status name for CSS classes, e.g. 'in_progress'"""
+        return ProjectStatus(self.status).name.lower()
+
 class ProjectFile(models.Model):
     """Files uploaded for a project"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='files')
-    file = models.FileField(upload_to='project_files/%Y/%m/%d/')
+    # Uploaded by the browser straight to S3; size, type, etag (SHA-256 of
+    # the content) and is_clean are filled in by core.tasks.record_uploaded_files
+    s3_key = models.CharField(max_length=1024, db_index=True)
     filename = models.CharField(max_length=500)
-    file_size = models.BigIntegerField()
-    file_type = models.CharField(max_length=50)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    file_type = models.CharField(max_length=50, blank=True)
+    etag = models.CharField(max_length=64, null=True, blank=True)
+    is_clean = models.BooleanField(null=True, blank=True)  # None until scanned
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(PseudonymousUser, on_delete=models.SET_NULL, null=True)
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['project', '-uploaded_at'], name='core_file_project_time'),
+        ]
     
     def __str__(self):
         return f"{self.project.project_id} - {self.filename}"
@@ -156,10 +246,11 @@ class Deliverable(models.Model):
         ('qa_report', 'QA Report'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='deliverables')
     deliverable_type = models.CharField(max_length=50, choices=DELIVERABLE_TYPES)
-    file = models.FileField(upload_to='deliverables/%Y/%m/%d/')
+    s3_key = models.CharField(max_length=1024, db_index=True)
+    etag = models.CharField(max_length=64, null=True, blank=True)
     filename = models.CharField(max_length=500)
     description = models.TextField(null=True, blank=True)
     
@@ -168,13 +259,16 @@ class Deliverable(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['project', '-uploaded_at'], name='core_deliv_project_time'),
+        ]
     
     def __str__(self):
         return f"{self.project.project_id} - {self.get_deliverable_type_display()}"
 
 class Message(models.Model):
     """Chat messages between client and admin"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(PseudonymousUser, on_delete=models.SET_NULL, null=True)
     content = models.TextField()
@@ -183,39 +277,52 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['project', 'created_at'], name='core_msg_project_time'),
+        ]
     
     def __str__(self):
         return f"{self.project.project_id} - {self.sender.alias}"
 
+    @classmethod
+    def list_for_project(cls, project_id):
+        """
+        A project's messages as dicts, oldest first, with the sender's alias
+        joined in as sender__alias rather than loaded per message
+        """
+        return cls.objects.filter(project_id=project_id).values(
+            'id', 'content', 'created_at', 'is_read', 'sender__alias'
+        )
+
 class AuditLog(models.Model):
     """Immutable audit trail for compliance"""
-    ACTION_CHOICES = [
-        ('project_submitted', 'Project Submitted'),
-        ('project_accepted', 'Project Accepted'),
-        ('status_changed', 'Status Changed'),
-        ('file_uploaded', 'File Uploaded'),
-        ('file_downloaded', 'File Downloaded'),
-        ('deliverable_uploaded', 'Deliverable Uploaded'),
-        ('payment_processed', 'Payment Processed'),
-        ('message_sent', 'Message Sent'),
-        ('project_rejected', 'Project Rejected'),
-        ('dispute_filed', 'Dispute Filed'),
-    ]
+    Action = AuditAction
+    ACTION_CHOICES = AuditAction.choices
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # uuid7 keys are time-ordered, so inserts append to the btree instead of
+    # landing on a random page (also used by the other append-heavy tables)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
     user = models.ForeignKey(PseudonymousUser, on_delete=models.SET_NULL, null=True, blank=True)
-    action = models.CharField(max_length=50, choices=ACTION_CHOICES)
-    details = models.JSONField(default=dict)
+    action = models.PositiveSmallIntegerField(choices=AuditAction.choices)
+    details = models.JSONField(default=dict, encoder=OrjsonEncoder)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the row is built, i.e. when core.audit queues it; auto_now_add
+    # would stamp the later batch insert instead
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['project', 'action']),
             models.Index(fields=['user', 'action']),
+            # Per-project trail newest-first, and time-range scans of the
+            # append-only table
+            models.Index(fields=['project', '-created_at'], name='core_audit_project_time'),
+            BrinIndex(fields=['created_at'], name='core_audit_created_brin'),
+            # Containment lookups, e.g. details__contains={'payment_intent_id': ...}
+            GinIndex(fields=['details'], opclasses=['jsonb_path_ops'], name='core_audit_details_gin'),
         ]
     
     def __str__(self):
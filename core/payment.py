@@ -3,84 +3,168 @@ Stripe payment and escrow management for ShadowIQ
 Handles payment processing, holds, and payouts
 """
 
+import logging
+from contextvars import ContextVar
+
 import stripe
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from .models import Project, AuditLog
+from .audit import enqueue_audit
+from .models import Project, AuditAction, ProjectStatus
+
+logger = logging.getLogger(__name__)
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+STRIPE_PUBLIC_KEY = settings.STRIPE_PUBLIC_KEY  # for Stripe.js on the payment page
+
+# Columns StripePaymentManager reads; load payment-flow projects with
+# payment_project_queryset() so descriptions are never fetched
+PAYMENT_PROJECT_FIELDS = (
+    'id', 'project_id', 'title', 'status', 'payment_status',
+    'stripe_payment_intent_id', 'client', 'client_alias',
+    'assigned_analyst__id', 'assigned_analyst__alias',
+)
+
+
+def payment_project_queryset():
+    """Projects with only the columns the payment flow needs"""
+    return Project.objects.select_related('assigned_analyst').only(*PAYMENT_PROJECT_FIELDS)
+
+# PaymentIntents already fetched during the current request, keyed by id.
+# A context variable, so async views sharing the event loop thread each see
+# their own; clear_intent_cache() resets it on request_finished for WSGI
+# threads that are reused between requests
+_intent_cache = ContextVar('stripe_intents', default=None)
+
+# Related objects returned inline with every PaymentIntent so charge and fee
+# details never need a second API call
+INTENT_EXPAND = ['latest_charge.balance_transaction']
+
+
+def _cached_intents():
+    intents = _intent_cache.get()
+    if intents is None:
+        intents = {}
+        _intent_cache.set(intents)
+    return intents
+
+
+def _retrieve_intent(payment_intent_id):
+    """stripe.PaymentIntent.retrieve, expanded and memoized for the rest of the request"""
+    intents = _cached_intents()
+    intent = intents.get(payment_intent_id)
+    if intent is None:
+        intent = intents[payment_intent_id] = stripe.PaymentIntent.retrieve(
+            payment_intent_id, expand=INTENT_EXPAND,
+        )
+    return intent
+
+
+async def _aretrieve_intent(payment_intent_id):
+    """Async _retrieve_intent, sharing its per-request cache"""
+    intents = _cached_intents()
+    intent = intents.get(payment_intent_id)
+    if intent is None:
+        intent = intents[payment_intent_id] = await stripe.PaymentIntent.retrieve_async(
+            payment_intent_id, expand=INTENT_EXPAND,
+        )
+    return intent
+
+
+def _stripe_fee(intent):
+    """Stripe's processing fee for the intent's charge, None until it settles"""
+    charge = getattr(intent, 'latest_charge', None)
+    balance_transaction = getattr(charge, 'balance_transaction', None)
+    return getattr(balance_transaction, 'fee', None)
+
+
+def clear_intent_cache(**kwargs):
+    """Forget PaymentIntents fetched during the finished request"""
+    _intent_cache.set(None)
+
+
+async def _update_project(project, **fields):
+    """Write only the given columns and mirror them on the instance"""
+    for name, value in fields.items():
+        setattr(project, name, value)
+    project.updated_at = timezone.now()
+    await Project.objects.filter(pk=project.pk).aupdate(updated_at=project.updated_at, **fields)
+
 
 class StripePaymentManager:
-    """Manage Stripe payments and escrow"""
+    """
+    Manage Stripe payments and escrow. The methods behind the payment views
+    are coroutines that call Stripe's async API over httpx, so a request
+    waiting on Stripe does not hold a worker thread.
+    """
     
     @staticmethod
-    def create_payment_intent(project, amount_cents):
+    async def create_payment_intent(project, amount_cents):
         """Create a Stripe PaymentIntent for project payment"""
         try:
-            intent = stripe.PaymentIntent.create(
+            intent = await stripe.PaymentIntent.create_async(
                 amount=amount_cents,
                 currency='usd',
                 metadata={
                     'project_id': project.project_id,
                     'project_uuid': str(project.id),
-                    'client_alias': project.client.alias,
+                    'client_alias': project.client_alias,
                 },
                 description=f"ShadowIQ Project {project.project_id}: {project.title}",
             )
             
             # Update project with payment intent ID
-            project.stripe_payment_intent_id = intent.id
-            project.payment_status = 'processing'
-            project.save()
+            await _update_project(
+                project,
+                stripe_payment_intent_id=intent.id,
+                payment_status='processing',
+            )
             
             return intent
-        except stripe.error.StripeError as e:
-            print(f"Stripe error creating payment intent: {e}")
+        except stripe.error.StripeError:
+            logger.exception("Stripe payment intent creation failed for project %s", project.project_id)
             return None
     
     @staticmethod
-    def confirm_payment(project, payment_intent_id):
+    async def confirm_payment(project, payment_intent_id):
         """Confirm payment and hold funds in escrow"""
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = await _aretrieve_intent(payment_intent_id)
             
             if intent.status == 'succeeded':
                 # Payment successful - hold funds
-                project.payment_status = 'completed'
-                project.status = 'accepted'
-                project.save()
+                await _update_project(project, payment_status='completed', status=ProjectStatus.ACCEPTED)
                 
                 # Log audit trail
-                AuditLog.objects.create(
+                enqueue_audit(
                     project=project,
-                    action='payment_processed',
+                    action=AuditAction.PAYMENT_PROCESSED,
                     details={
                         'amount': intent.amount,
                         'currency': intent.currency,
                         'payment_intent_id': payment_intent_id,
+                        'stripe_fee': _stripe_fee(intent),
                     }
                 )
                 
                 return True
             else:
-                project.payment_status = 'failed'
-                project.save()
+                await _update_project(project, payment_status='failed')
                 return False
-        except stripe.error.StripeError as e:
-            print(f"Stripe error confirming payment: {e}")
-            project.payment_status = 'failed'
-            project.save()
+        except stripe.error.StripeError:
+            logger.exception("Stripe payment confirmation failed for project %s", project.project_id)
+            await _update_project(project, payment_status='failed')
             return False
     
     @staticmethod
-    def release_payment_to_analyst(project, analyst_stripe_account_id):
+    async def release_payment_to_analyst(project, analyst_stripe_account_id):
         """Release escrowed funds to analyst after project completion"""
         try:
             if not project.stripe_payment_intent_id:
                 return False
             
-            intent = stripe.PaymentIntent.retrieve(project.stripe_payment_intent_id)
+            intent = await _aretrieve_intent(project.stripe_payment_intent_id)
             
             if intent.status != 'succeeded':
                 return False
@@ -92,7 +176,7 @@ class StripePaymentManager:
             analyst_payout = total_amount - platform_fee
             
             # Create transfer to analyst's Stripe account
-            transfer = stripe.Transfer.create(
+            transfer = await stripe.Transfer.create_async(
                 amount=analyst_payout,
                 currency='usd',
                 destination=analyst_stripe_account_id,
@@ -101,52 +185,56 @@ class StripePaymentManager:
                     'analyst_alias': project.assigned_analyst.alias if project.assigned_analyst else 'Unknown',
                 },
                 description=f"ShadowIQ Project {project.project_id} Payout",
+                # A retried or concurrent release gets the first transfer back
+                idempotency_key=f'payout-{project.id}',
             )
             
             # Log audit trail
-            AuditLog.objects.create(
+            enqueue_audit(
                 project=project,
-                action='payout_released',
+                action=AuditAction.PAYOUT_RELEASED,
                 details={
                     'transfer_id': transfer.id,
                     'amount': analyst_payout,
                     'platform_fee': platform_fee,
+                    'stripe_fee': _stripe_fee(intent),
                 }
             )
             
             return True
-        except stripe.error.StripeError as e:
-            print(f"Stripe error releasing payment: {e}")
+        except stripe.error.StripeError:
+            logger.exception("Stripe payout failed for project %s", project.project_id)
             return False
     
     @staticmethod
-    def refund_payment(project, reason=''):
-        """Refund payment to client"""
+    async def refund_payment(project, reason=''):
+        """Refund payment to client and reject the project"""
         try:
             if not project.stripe_payment_intent_id:
                 return False
             
-            intent = stripe.PaymentIntent.retrieve(project.stripe_payment_intent_id)
+            intent = await _aretrieve_intent(project.stripe_payment_intent_id)
             
             if intent.status != 'succeeded':
                 return False
             
             # Create refund
-            refund = stripe.Refund.create(
+            refund = await stripe.Refund.create_async(
                 payment_intent=project.stripe_payment_intent_id,
                 metadata={
                     'project_id': project.project_id,
                     'reason': reason,
-                }
+                },
+                # A retried or concurrent refund gets the first refund back
+                idempotency_key=f'refund-{project.id}',
             )
             
-            project.payment_status = 'refunded'
-            project.save()
+            await _update_project(project, payment_status='refunded', status=ProjectStatus.REJECTED)
             
             # Log audit trail
-            AuditLog.objects.create(
+            enqueue_audit(
                 project=project,
-                action='payment_refunded',
+                action=AuditAction.PAYMENT_REFUNDED,
                 details={
                     'refund_id': refund.id,
                     'amount': refund.amount,
@@ -155,18 +243,18 @@ class StripePaymentManager:
             )
             
             return True
-        except stripe.error.StripeError as e:
-            print(f"Stripe error refunding payment: {e}")
+        except stripe.error.StripeError:
+            logger.exception("Stripe refund failed for project %s", project.project_id)
             return False
     
     @staticmethod
     def get_payment_status(payment_intent_id):
         """Get current payment status"""
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = _retrieve_intent(payment_intent_id)
             return intent.status
-        except stripe.error.StripeError as e:
-            print(f"Stripe error getting payment status: {e}")
+        except stripe.error.StripeError:
+            logger.exception("Stripe status lookup failed for payment intent %s", payment_intent_id)
             return None
     
     @staticmethod
@@ -174,7 +262,7 @@ class StripePaymentManager:
         """Create a Stripe invoice for project"""
         try:
             invoice = stripe.Invoice.create(
-                customer=project.client.alias,  # Use alias as customer ID
+                customer=project.client_alias,  # Use alias as customer ID
                 amount=amount_cents,
                 currency='usd',
                 description=description,
@@ -185,6 +273,6 @@ class StripePaymentManager:
             )
             
             return invoice
-        except stripe.error.StripeError as e:
-            print(f"Stripe error creating invoice: {e}")
+        except stripe.error.StripeError:
+            logger.exception("Stripe invoice creation failed for project %s", project.project_id)
             return None
@@ -0,0 +1,71 @@
+"""
+Deferred last_seen tracking for ShadowIQ
+Touches are queued in a Redis sorted set and flushed in bulk
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PseudonymousUser
+
+PENDING_KEY = 'last_seen_pending'
+FLUSH_BATCH_SIZE = 1000
+
+_redis_client = None
+
+
+def _get_redis():
+    """Shared Redis client, or None when Redis is not configured"""
+    global _redis_client
+    if _redis_client is None and settings.REDIS_URL:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def record_last_seen(user_id):
+    """Queue a last_seen touch; written straight to the DB without Redis"""
+    client = _get_redis()
+    if client is None:
+        PseudonymousUser.objects.filter(pk=user_id).update(last_seen=timezone.now())
+        return
+    # ZADD keeps one entry per user holding the newest timestamp
+    client.zadd(PENDING_KEY, {str(user_id): time.time()})
+
+
+async def arecord_last_seen(user_id):
+    """Async record_last_seen for the ASGI middleware path"""
+    client = _get_redis()
+    if client is None:
+        await PseudonymousUser.objects.filter(pk=user_id).aupdate(last_seen=timezone.now())
+        return
+    # The Redis client is thread-safe, so the ZADD need not queue behind
+    # the thread-sensitive executor
+    await sync_to_async(client.zadd, thread_sensitive=False)(PENDING_KEY, {str(user_id): time.time()})
+
+
+def flush_last_seen():
+    """Write queued touches with one UPDATE per minute bucket; returns users updated"""
+    client = _get_redis()
+    if client is None:
+        return 0
+
+    flushed = 0
+    while True:
+        entries = client.zpopmin(PENDING_KEY, FLUSH_BATCH_SIZE)
+        if not entries:
+            return flushed
+
+        buckets = defaultdict(list)
+        for member, score in entries:
+            buckets[int(score) // 60 * 60].append(member.decode())
+
+        for minute, user_ids in buckets.items():
+            seen = datetime.fromtimestamp(minute, tz=dt_timezone.utc)
+            PseudonymousUser.objects.filter(id__in=user_ids).update(last_seen=seen)
+        flushed += len(entries)
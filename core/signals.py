@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .middleware import user_cache_key
+from .models import Deliverable, Project, ProjectFile, PseudonymousUser
+from .payment import clear_intent_cache
+from .storage import S3StorageManager
+
+
+@receiver(post_save, sender=PseudonymousUser)
+@receiver(post_delete, sender=PseudonymousUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the middleware's cached copy whenever a user row changes"""
+    cache.delete(user_cache_key(instance.id))
+
+
+@receiver(pre_save, sender=Project)
+def sync_client_alias(sender, instance, update_fields=None, **kwargs):
+    """Copy the client's alias onto the project whenever the client is saved"""
+    if update_fields is not None and 'client' not in update_fields:
+        return
+    if Project.client.is_cached(instance):
+        instance.client_alias = instance.client.alias
+    else:
+        instance.client_alias = (
+            PseudonymousUser.objects.filter(pk=instance.client_id)
+            .values_list('alias', flat=True)
+            .first()
+        ) or ''
+
+
+@receiver(post_save, sender=PseudonymousUser)
+def propagate_alias(sender, instance, created, update_fields=None, **kwargs):
+    """Keep Project.client_alias current if an alias is edited"""
+    if created or (update_fields is not None and 'alias' not in update_fields):
+        return
+    # update() skips auto_now; bumping updated_at also retires the cached
+    # dashboard fragments, which are keyed on it
+    Project.objects.filter(client_id=instance.pk).exclude(client_alias=instance.alias).update(
+        client_alias=instance.alias, updated_at=timezone.now()
+    )
+
+
+@receiver(pre_delete, sender=Project)
+def delete_project_objects(sender, instance, **kwargs):
+    """Remove a deleted project's files from S3 in bulk once the delete commits"""
+    s3_keys = [
+        *ProjectFile.objects.filter(project=instance).values_list('s3_key', flat=True),
+        *Deliverable.objects.filter(project=instance).values_list('s3_key', flat=True),
+    ]
+    if s3_keys:
+        transaction.on_commit(lambda: S3StorageManager().bulk_delete(s3_keys))
+
+
+@receiver(post_delete, sender=ProjectFile)
+@receiver(post_delete, sender=Deliverable)
+def delete_object(sender, instance, origin=None, **kwargs):
+    """Remove a single deleted file from S3; project cascades are batched above"""
+    if isinstance(origin, Project):
+        return
+    s3_key = instance.s3_key
+    transaction.on_commit(lambda: S3StorageManager().delete_file(s3_key))
+
+
+# PaymentIntent lookups are memoized per request; drop them when it ends
+request_finished.connect(clear_intent_cache, dispatch_uid='core.payment.clear_intent_cache')
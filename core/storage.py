@@ -1,27 +1,133 @@
 import os
 import hashlib
+import hmac
+import logging
+import secrets
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-from django.utils import timezone
+from functools import lru_cache
 from django.conf import settings
 import boto3
+from botocore import auth as botocore_auth
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+logger = logging.getLogger(__name__)
+
+# Bytes of an S3 object body sent per clamd INSTREAM chunk
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+# delete_objects accepts at most this many keys per call
+DELETE_BATCH_SIZE = 1000
+# Concurrent head_object calls in bulk_head; below the client's pool size
+HEAD_WORKERS = 32
+
+
+@lru_cache(maxsize=16)
+def _sigv4_signing_key(secret_key, date, region, service):
+    """SigV4 signing key; it only changes with the date, region and service"""
+    key = f'AWS4{secret_key}'.encode()
+    for part in (date, region, service, 'aws4_request'):
+        key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+    return key
+
+
+class CachedSigningKeyMixin:
+    """Sign with the cached SigV4 key instead of re-deriving it per request"""
+
+    def signature(self, string_to_sign, request):
+        key = _sigv4_signing_key(
+            self.credentials.secret_key,
+            request.context['timestamp'][0:8],
+            self._region_name,
+            self._service_name,
+        )
+        return self._sign(key, string_to_sign, hex=True)
+
+
+class CachedS3SigV4Auth(CachedSigningKeyMixin, botocore_auth.S3SigV4Auth):
+    pass
+
+
+class CachedS3SigV4QueryAuth(CachedSigningKeyMixin, botocore_auth.S3SigV4QueryAuth):
+    pass
+
+
+class CachedS3SigV4PostAuth(CachedSigningKeyMixin, botocore_auth.S3SigV4PostAuth):
+    pass
+
+
+# botocore resolves signer classes by name from AUTH_TYPE_MAPS. The caching
+# signers are added under names of their own, which only the shared client
+# below asks for, so other botocore clients keep the stock signers.
+# Signatures are unchanged.
+CACHED_SIGNERS = {
+    's3v4': 'shadowiq-s3v4',
+    's3v4-query': 'shadowiq-s3v4-query',
+    's3v4-presign-post': 'shadowiq-s3v4-presign-post',
+}
+botocore_auth.AUTH_TYPE_MAPS.update({
+    CACHED_SIGNERS['s3v4']: CachedS3SigV4Auth,
+    CACHED_SIGNERS['s3v4-query']: CachedS3SigV4QueryAuth,
+    CACHED_SIGNERS['s3v4-presign-post']: CachedS3SigV4PostAuth,
+})
+
+
+def _choose_cached_signer(signature_version, **kwargs):
+    """choose-signer handler swapping S3 SigV4 for its caching equivalent"""
+    return CACHED_SIGNERS.get(signature_version)
+
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def _get_s3_client():
+    """
+    Process-wide S3 client, so every manager shares one connection pool.
+    Built under a lock because boto3's default session is not thread-safe.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                client = boto3.client(
+                    's3',
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    config=Config(
+                        # Without this, presigns in us-east-1 fall back to SigV2
+                        signature_version='s3v4',
+                        max_pool_connections=64,
+                        retries={'max_attempts': 3, 'mode': 'adaptive'},
+                        tcp_keepalive=True,
+                    ),
+                )
+                # Runs after botocore's own choose-signer handlers, which
+                # leave an explicitly configured s3v4 alone
+                client.meta.events.register('choose-signer.s3', _choose_cached_signer)
+                _s3_client = client
+    return _s3_client
+
+
 class S3StorageManager:
     """Manage S3 file uploads and downloads"""
     
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME,
-        )
+        self.s3_client = _get_s3_client()
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
     
     def generate_s3_key(self, project_id, file_type, filename):
         """Generate S3 key for file"""
-        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        return f"projects/{project_id}/{file_type}/{timestamp}_{filename}"
+        # UTC, as timezone.now() gave, without building an aware datetime;
+        # the random part keeps same-second uploads of one filename apart
+        timestamp = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        return f"projects/{project_id}/{file_type}/{timestamp}_{secrets.token_hex(4)}_{filename}"
     
     def get_upload_url(self, s3_key, content_type='application/octet-stream'):
         """Generate presigned POST URL for client-side upload"""
@@ -40,8 +146,8 @@ class S3StorageManager:
                 ExpiresIn=3600,  # 1 hour
             )
             return response
-        except ClientError as e:
-            print(f"Error generating upload URL: {e}")
+        except ClientError:
+            logger.exception("S3 upload URL generation failed for %s", s3_key)
             return None
     
     def get_download_url(self, s3_key, expires_in=3600):
@@ -53,8 +159,8 @@ class S3StorageManager:
                 ExpiresIn=expires_in,
             )
             return url
-        except ClientError as e:
-            print(f"Error generating download URL: {e}")
+        except ClientError:
+            logger.exception("S3 download URL generation failed for %s", s3_key)
             return None
     
     def delete_file(self, s3_key):
@@ -62,15 +168,89 @@ class S3StorageManager:
         try:
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
             return True
-        except ClientError as e:
-            print(f"Error deleting file: {e}")
+        except ClientError:
+            logger.exception("S3 delete failed for %s", s3_key)
             return False
     
-    def scan_file_for_virus(self, s3_key):
-        """Placeholder for virus scanning integration"""
-        # In production, integrate with ClamAV or similar service
-        # For MVP, just return True
-        return True
+    def bulk_delete(self, s3_keys):
+        """Delete many files, up to DELETE_BATCH_SIZE keys per request"""
+        s3_keys = list(s3_keys)
+        ok = True
+        for start in range(0, len(s3_keys), DELETE_BATCH_SIZE):
+            chunk = s3_keys[start:start + DELETE_BATCH_SIZE]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True},
+                )
+            except ClientError:
+                logger.exception("S3 bulk delete failed for %d keys", len(chunk))
+                ok = False
+                continue
+            # Quiet mode only reports the keys that failed
+            for error in response.get('Errors', []):
+                logger.error("S3 delete failed for %s: %s", error.get('Key'), error.get('Message'))
+                ok = False
+        return ok
+    
+    def bulk_head(self, s3_keys):
+        """
+        Metadata for many files as {s3_key: metadata or None}. S3 has no
+        batch HEAD, so requests run concurrently on the shared client.
+        """
+        s3_keys = list(s3_keys)
+        if not s3_keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(HEAD_WORKERS, len(s3_keys))) as pool:
+            return dict(zip(s3_keys, pool.map(self.get_file_metadata, s3_keys)))
+    
+    def hash_and_scan(self, s3_key):
+        """
+        SHA-256 of a stored file and a clamd INSTREAM scan of it, from one
+        read of the S3 body. Returns (hexdigest, is_clean): the digest is None
+        if the file cannot be read; is_clean is True if clean, False if
+        infected and None if the scanner could not be reached.
+        """
+        try:
+            body = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)['Body']
+        except ClientError:
+            logger.exception("S3 read failed for %s", s3_key)
+            return None, None
+
+        # OpenSSL's SHA-256 uses the CPU's SHA extensions where available
+        digest = hashlib.sha256()
+        reply = None
+        with body:
+            chunks = body.iter_chunks(SCAN_CHUNK_SIZE)
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(settings.CLAMD_SOCKET)
+                    sock.sendall(b'zINSTREAM\0')
+                    for chunk in chunks:
+                        digest.update(chunk)
+                        sock.sendall(struct.pack('!L', len(chunk)))
+                        sock.sendall(chunk)
+                    sock.sendall(struct.pack('!L', 0))
+                    reply = sock.makefile('rb').read().rstrip(b'\0').decode()
+            except OSError:
+                logger.exception("Virus scan failed for %s", s3_key)
+            # Without the scanner, still hash whatever has not been read yet
+            for chunk in chunks:
+                digest.update(chunk)
+
+        return digest.hexdigest(), self._scan_verdict(s3_key, reply)
+
+    def _scan_verdict(self, s3_key, reply):
+        """is_clean for a clamd reply: 'stream: OK', 'stream: <signature> FOUND' or '... ERROR'"""
+        if reply is None:
+            return None
+        if reply.endswith('OK'):
+            return True
+        if reply.endswith('FOUND'):
+            logger.warning("Virus scan flagged %s: %s", s3_key, reply)
+            return False
+        logger.error("Virus scan error for %s: %s", s3_key, reply)
+        return None
     
     def get_file_metadata(self, s3_key):
         """Get file metadata from S3"""
@@ -80,7 +260,8 @@ class S3StorageManager:
                 'size': response['ContentLength'],
                 'last_modified': response['LastModified'],
                 'content_type': response.get('ContentType', 'application/octet-stream'),
+                'etag': response.get('ETag', '').strip('"'),
             }
-        except ClientError as e:
-            print(f"Error getting file metadata: {e}")
+        except ClientError:
+            logger.exception("S3 metadata lookup failed for %s", s3_key)
             return None
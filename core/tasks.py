@@ -0,0 +1,73 @@
+"""
+Background tasks for ShadowIQ
+Work that does not need to finish before the response is returned
+"""
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .models import ProjectFile, PseudonymousUser
+from .storage import S3StorageManager
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_magic_link_task(user_id, magic_link):
+    """Send magic link email to user"""
+    user = PseudonymousUser.objects.only('alias', 'email').get(id=user_id)
+
+    subject = "Your ShadowIQ Magic Link"
+    message = f"""
+    Hello {user.alias},
+    
+    Click the link below to access your ShadowIQ account:
+    {magic_link}
+    
+    This link expires in 24 hours.
+    
+    If you didn't request this link, please ignore this email.
+    
+    Best regards,
+    ShadowIQ Team
+    """
+    
+    try:
+        send_mail(
+            subject,
+            message,
+            settings.EMAIL_HOST_USER,
+            [user.email],
+            fail_silently=False,
+        )
+        return True
+    except OSError:
+        # smtplib.SMTPException is an OSError, as are connection failures
+        logger.exception("magic-link send failed for user_id=%s", user_id)
+        return False
+
+
+@shared_task
+def record_uploaded_files(s3_keys):
+    """
+    Copy size and content type of objects uploaded straight to S3 onto their
+    ProjectFile rows, with a SHA-256 of the content as the etag and the
+    virus-scan verdict. Each body is read once for both. Takes a batch of
+    keys, as from an S3 event queue.
+    """
+    storage = S3StorageManager()
+    recorded = 0
+    for s3_key, metadata in storage.bulk_head(s3_keys).items():
+        if metadata is None:
+            continue
+        etag, is_clean = storage.hash_and_scan(s3_key)
+        recorded += ProjectFile.objects.filter(s3_key=s3_key).update(
+            file_size=metadata['size'],
+            file_type=metadata['content_type'][:50],
+            etag=etag,
+            is_clean=is_clean,
+        )
+    return recorded
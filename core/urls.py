@@ -1,11 +1,29 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
 
 app_name = 'core'
 
+# Everything under project/<project_id>/payment/, matched after the prefix
+payment_urls = [
+    path('', views.payment_page, name='payment_page'),
+    path('create/', views.create_payment, name='create_payment'),
+    path('confirm/', views.confirm_payment, name='confirm_payment'),
+    path('success/', views.payment_success, name='payment_success'),
+    path('cancel/', views.payment_cancel, name='payment_cancel'),
+    path('release/', views.release_payment, name='release_payment'),
+    path('refund/', views.refund_payment, name='refund_payment'),
+]
+
+# Everything under project/<project_id>/
+project_urls = [
+    path('', views.project_detail, name='project_detail'),
+    path('files/upload-url/', views.request_upload_url, name='request_upload_url'),
+    path('files/<uuid:file_id>/complete/', views.complete_upload, name='complete_upload'),
+    path('payment/', include(payment_urls)),
+]
+
 urlpatterns = [
-    # ... existing paths ...
-        # --- Main views ---
+    # --- Main views ---
     path('', views.home, name='home'), 
     path('login/', views.login_placeholder, name='login'),
     path('auth/request-magic-link/', views.request_magic_link, name='request_magic_link'),
@@ -15,12 +33,5 @@ urlpatterns = [
     path('dashboard/analyst/', views.analyst_dashboard, name='analyst_dashboard'),
     path('dashboard/admin/', views.admin_dashboard, name='admin_dashboard'),
     path('project/submit/', views.submit_project, name='submit_project'),
-    path('project/<str:project_id>/', views.project_detail, name='project_detail'),
-    path('project/<str:project_id>/payment/', views.payment_page, name='payment_page'),
-    path('project/<str:project_id>/payment/create/', views.create_payment, name='create_payment'),
-    path('project/<str:project_id>/payment/confirm/', views.confirm_payment, name='confirm_payment'),
-    path('project/<str:project_id>/payment/success/', views.payment_success, name='payment_success'),
-    path('project/<str:project_id>/payment/cancel/', views.payment_cancel, name='payment_cancel'),
-    path('project/<str:project_id>/payment/release/', views.release_payment, name='release_payment'),
-    path('project/<str:project_id>/payment/refund/', views.refund_payment, name='refund_payment'),
+    path('project/<str:project_id>/', include(project_urls)),
 ]
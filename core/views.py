@@ -1,21 +1,31 @@
 from datetime import timedelta
-from django.shortcuts import render, get_object_or_404, redirect
+from decimal import ROUND_HALF_UP, Decimal
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.http import JsonResponse, HttpResponse
 from django.conf import settings
 from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.crypto import get_random_string
+from django.utils.text import get_valid_filename
+from django.views.decorators.cache import cache_control, cache_page
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.contrib.auth import login, logout
-import secrets
+import os
 import uuid
-from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 
-from .models import PseudonymousUser, Project, AuditLog, AuthToken
-from .payment import StripePaymentManager
+from .audit import enqueue_audit
+from .models import PseudonymousUser, Project, ProjectFile, AuditAction, AuthToken
+from .auth import generate_magic_token, magic_link_url, verify_magic_token
+from .middleware import user_cache_key
+from .payment import STRIPE_PUBLIC_KEY, StripePaymentManager, payment_project_queryset
+from .storage import S3StorageManager
+from .tasks import record_uploaded_files
 from .decorators import (
     pseudonymous_user_required as require_auth,
     admin_required as require_admin,
@@ -24,13 +34,42 @@ from .decorators import (
     get_client_ip,
 )
 
+# Project columns each dashboard template reads
+CLIENT_DASHBOARD_FIELDS = (
+    'id', 'project_id', 'title', 'description', 'research_area',
+    'support_type', 'status', 'deadline', 'created_at',
+)
+ANALYST_DASHBOARD_FIELDS = ('id', 'title', 'status', 'client_alias')
+ADMIN_DASHBOARD_FIELDS = (
+    'id', 'project_id', 'title', 'client_alias', 'support_type', 'status',
+    'created_at', 'assigned_analyst__id', 'assigned_analyst__alias',
+)
+
+# Project columns the payment, success and cancel pages render
+PAYMENT_PAGE_FIELDS = ('id', 'project_id', 'title', 'support_type', 'status', 'agreed_price')
+
+CENT = Decimal('0.01')
+MAX_PAYMENT_AMOUNT = Decimal(str(settings.MAX_PAYMENT_AMOUNT))
+
+
+def _list_version(projects):
+    """
+    Count and newest updated_at of a project list, for {% cache %} keys:
+    any save, addition or removal moves the key, so nothing has to be evicted
+    """
+    stats = projects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    updated = stats['updated'].timestamp() if stats['updated'] else 0
+    return f"{stats['count']}-{updated}"
+
 
 # ----------------------------
 # BASIC / LANDING VIEWS
 # ----------------------------
 
+@cache_control(public=True, max_age=3600)
+@cache_page(60 * 60)
 def home(request):
-    """Public landing page"""
+    """Public landing page; identical for every visitor, so cached for an hour"""
     return render(request, 'core/landing.html')
 
 
@@ -42,9 +81,10 @@ def login_placeholder(request):
 @client_required
 def client_dashboard(request):
     """Client dashboard - shows user's projects"""
-    projects = Project.objects.filter(client=request.user).order_by('-created_at')
+    projects = Project.objects.filter(client=request.user).only(*CLIENT_DASHBOARD_FIELDS).order_by('-created_at')
     return render(request, 'core/client_dashboard.html', {
         'projects': projects,
+        'projects_version': _list_version(projects),
         'user': request.user
     })
 
@@ -52,9 +92,10 @@ def client_dashboard(request):
 @require_analyst
 def analyst_dashboard(request):
     """Analyst dashboard - shows assigned projects"""
-    projects = Project.objects.filter(assigned_analyst=request.user).order_by('-created_at')
+    projects = Project.objects.filter(assigned_analyst=request.user).only(*ANALYST_DASHBOARD_FIELDS).order_by('-created_at')
     return render(request, 'core/analyst_dashboard.html', {
         'projects': projects,
+        'projects_version': _list_version(projects),
         'user': request.user
     })
 
@@ -63,10 +104,16 @@ def analyst_dashboard(request):
 def admin_dashboard(request):
     """Admin dashboard - shows all users and projects"""
     users = PseudonymousUser.objects.all().order_by('-created_at')
-    projects = Project.objects.all().order_by('-created_at')
+    projects = (
+        Project.objects.select_related('assigned_analyst')
+        .only(*ADMIN_DASHBOARD_FIELDS)
+        .order_by('-created_at')
+    )
+    page_obj = Paginator(projects, settings.DASHBOARD_PAGE_SIZE).get_page(request.GET.get('page'))
     return render(request, 'core/admin_dashboard.html', {
         'users': users,
-        'projects': projects,
+        'projects': page_obj,
+        'page_obj': page_obj,
         'user': request.user
     })
 
@@ -86,27 +133,23 @@ def request_magic_link(request):
                 'error': 'Please provide either an alias or email.'
             })
 
-        # Find or create pseudonymous user
-        user, created = PseudonymousUser.objects.get_or_create(
+        # Find or create pseudonymous user; the token and audit entry need
+        # only these columns of an existing row
+        user, created = PseudonymousUser.objects.only('id', 'alias', 'last_login').get_or_create(
             alias=alias or f"User-{get_random_string(6)}",
             defaults={'email': email or None}
         )
 
-        # Generate magic token
-        token = secrets.token_urlsafe(32)
-        user.magic_token = token
-        user.magic_token_expires = timezone.now() + timezone.timedelta(hours=24)
-        user.save()
+        # Signed magic token; nothing to save
+        token = generate_magic_token(user)
 
         # Build verification link
-        magic_link = request.build_absolute_uri(
-            f'/auth/verify-magic-link/?token={token}'
-        )
+        magic_link = magic_link_url(request, token)
 
         # Log request
-        AuditLog.objects.create(
+        enqueue_audit(
             user=user,
-            action='magic_link_requested',
+            action=AuditAction.MAGIC_LINK_REQUESTED,
             details={'alias': user.alias},
             ip_address=get_client_ip(request)
         )
@@ -129,25 +172,23 @@ def verify_magic_link(request):
         })
     
     try:
-        # Find user with valid, non-expired token
-        user = PseudonymousUser.objects.get(
-            magic_token=token,
-            magic_token_expires__gt=timezone.now()
-        )
-        
+        # Checks the signature and expiry, then records the login, which
+        # invalidates the token
+        user = verify_magic_token(token)
+        if user is None:
+            return render(request, 'core/invalid_token.html', {  # This one is in core/
+                'error': 'Invalid or expired token'
+            })
+
         # ✅ Instead of Django's login()
         request.session['pseudonymous_user_id'] = str(user.id)
-        
-        # Update user record
-        user.last_login = timezone.now()
-        user.magic_token = None  # Invalidate token after use
-        user.magic_token_expires = None
-        user.save()
+        # Saves PseudonymousAuthMiddleware a lookup on the redirect
+        cache.set(user_cache_key(user.id), user, settings.USER_CACHE_TTL)
         
         # Log successful login
-        AuditLog.objects.create(
+        enqueue_audit(
             user=user,
-            action='user_logged_in',
+            action=AuditAction.USER_LOGGED_IN,
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT')
         )
@@ -173,17 +214,15 @@ def verify_magic_link(request):
 def logout_view(request):
     """End pseudonymous session"""
     user_id = request.session.pop('pseudonymous_user_id', None)
-    if user_id:
-        try:
-            user = PseudonymousUser.objects.get(id=user_id)
-            AuditLog.objects.create(
-                user=user,
-                action='user_logged_out',
-                ip_address=get_client_ip(request)
-            )
-        except PseudonymousUser.DoesNotExist:
-            pass
-    return redirect('home')
+    # PseudonymousAuthMiddleware has already loaded the session's user and
+    # dropped the id if the row is gone, so there is nothing to look up
+    if user_id and request.user.is_authenticated:
+        enqueue_audit(
+            user=request.user,
+            action=AuditAction.USER_LOGGED_OUT,
+            ip_address=get_client_ip(request)
+        )
+    return redirect('core:home')
 
 
 # ----------------------------
@@ -193,9 +232,9 @@ def logout_view(request):
 @require_auth
 def project_detail(request, project_id):
     """View project details"""
-    project = get_object_or_404(Project, project_id=project_id)
+    project = get_object_or_404(Project.objects.with_people(), project_id=project_id)
 
-    if project.client.id != request.user.id and not request.user.is_admin:
+    if project.client_id != request.user.id and not request.user.is_admin:
         return render(request, 'core/access_denied.html', status=403)
 
     return render(request, 'core/project_detail.html', {'project': project})
@@ -205,20 +244,21 @@ def project_detail(request, project_id):
 def submit_project(request):
     """Project submission view - protected by client_required"""
     if request.method == 'POST':
+        data = request.POST
         project = Project.objects.create(
             client=request.user,
-            title=request.POST.get('title'),
-            description=request.POST.get('description'),
-            stage=request.POST.get('stage'),
-            support_type=request.POST.get('support_type'),
-            research_area=request.POST.get('research_area'),
-            confirms_lawful_use=bool(request.POST.get('lawful_use')),
-            confirms_data_rights=bool(request.POST.get('data_rights'))
+            title=data.get('title'),
+            description=data.get('description'),
+            stage=data.get('stage'),
+            support_type=data.get('support_type'),
+            research_area=data.get('research_area'),
+            confirms_lawful_use=bool(data.get('lawful_use')),
+            confirms_data_rights=bool(data.get('data_rights'))
         )
-        AuditLog.objects.create(
+        enqueue_audit(
             user=request.user,
             project=project,
-            action='project_submitted'
+            action=AuditAction.PROJECT_SUBMITTED
         )
         return redirect('core:project_detail', project_id=project.project_id)
 
@@ -226,124 +266,176 @@ def submit_project(request):
 
 
 # ----------------------------
-# PAYMENT VIEWS
+# FILE UPLOAD VIEWS
 # ----------------------------
 
+def _can_upload(user, project):
+    return project.client_id == user.id or user.is_admin or user.is_analyst
+
+
 @require_auth
-def create_payment(request, project_id):
-    """Create payment intent for project"""
-    project = get_object_or_404(Project, project_id=project_id)
+@require_POST
+def request_upload_url(request, project_id):
+    """
+    Presigned POST for uploading a project file straight to S3, so file
+    bytes never pass through the app server
+    """
+    project = get_object_or_404(Project.objects.only('id', 'project_id', 'client'), project_id=project_id)
+    if not _can_upload(request.user, project):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    filename = os.path.basename(request.POST.get('filename', '').strip())
+    filename = get_valid_filename(filename) if filename.strip('.') else 'upload'
+    content_type = request.POST.get('content_type', '') or 'application/octet-stream'
+
+    storage = S3StorageManager()
+    s3_key = storage.generate_s3_key(project.project_id, 'uploads', filename)
+    upload = storage.get_upload_url(s3_key, content_type)
+    if not upload:
+        return JsonResponse({'error': 'Failed to create upload'}, status=500)
+
+    project_file = ProjectFile.objects.create(
+        project=project,
+        s3_key=s3_key,
+        filename=filename,
+        file_type=content_type[:50],
+        uploaded_by=request.user,
+    )
+    return JsonResponse({
+        'file_id': str(project_file.id),
+        'url': upload['url'],
+        'fields': upload['fields'],
+    })
 
-    if project.client.id != request.user.id:
+
+@require_auth
+@require_POST
+def complete_upload(request, project_id, file_id):
+    """Called by the browser once S3 accepted the upload; records it in the background"""
+    project_file = get_object_or_404(
+        ProjectFile.objects.select_related('project').only('s3_key', 'project__client'),
+        id=file_id,
+        project__project_id=project_id,
+    )
+    if not _can_upload(request.user, project_file.project):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
-    if request.method == 'POST':
-        try:
-            amount = float(request.POST.get('amount', 0))
-            if amount <= 0:
-                return JsonResponse({'error': 'Invalid amount'}, status=400)
-
-            amount_cents = int(amount * 100)
-            intent = StripePaymentManager.create_payment_intent(project, amount_cents)
-
-            if not intent:
-                return JsonResponse({'error': 'Failed to create payment'}, status=500)
-
-            return JsonResponse({
-                'success': True,
-                'client_secret': intent.client_secret,
-                'payment_intent_id': intent.id,
-                'amount': amount,
-            })
-        except (ValueError, TypeError):
-            return JsonResponse({'error': 'Invalid amount'}, status=400)
+    record_uploaded_files.delay([project_file.s3_key])
+    return JsonResponse({'success': True}, status=202)
 
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+# ----------------------------
+# PAYMENT VIEWS
+# ----------------------------
 
 @require_auth
-def confirm_payment(request, project_id):
-    """Confirm payment after checkout"""
-    project = get_object_or_404(Project, project_id=project_id)
+@require_POST
+async def create_payment(request, project_id):
+    """Create payment intent for project"""
+    # Other clients' projects 404 exactly like missing ones
+    project = await aget_object_or_404(
+        payment_project_queryset(), project_id=project_id, client_id=request.user.id,
+    )
 
-    if project.client.id != request.user.id:
-        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    try:
+        # Decimal, so an amount like 19.99 is exactly 1999 cents; huge
+        # exponents and infinities fail the quantize
+        amount = Decimal(request.POST.get('amount', '0')).quantize(CENT, ROUND_HALF_UP)
+    except ArithmeticError:
+        return JsonResponse({'error': 'Invalid amount'}, status=400)
+
+    if not amount.is_finite() or not 0 < amount <= MAX_PAYMENT_AMOUNT:
+        return JsonResponse({'error': 'Invalid amount'}, status=400)
+    amount_cents = int(amount * 100)
+
+    intent = await StripePaymentManager.create_payment_intent(project, amount_cents)
+
+    if not intent:
+        return JsonResponse({'error': 'Failed to create payment'}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'client_secret': intent.client_secret,
+        'payment_intent_id': intent.id,
+        'amount': amount_cents / 100,
+    })
 
-    if request.method == 'POST':
-        payment_intent_id = request.POST.get('payment_intent_id', '').strip()
-        if not payment_intent_id:
-            return JsonResponse({'error': 'Missing payment intent ID'}, status=400)
 
-        success = StripePaymentManager.confirm_payment(project, payment_intent_id)
+@require_auth
+@require_POST
+async def confirm_payment(request, project_id):
+    """Confirm payment after checkout"""
+    # Other clients' projects 404 exactly like missing ones
+    project = await aget_object_or_404(
+        payment_project_queryset(), project_id=project_id, client_id=request.user.id,
+    )
+
+    payment_intent_id = request.POST.get('payment_intent_id', '').strip()
+    if not payment_intent_id:
+        return JsonResponse({'error': 'Missing payment intent ID'}, status=400)
 
-        if success:
-            return JsonResponse({'success': True, 'message': 'Payment confirmed'})
-        return JsonResponse({'error': 'Payment confirmation failed'}, status=400)
+    success = await StripePaymentManager.confirm_payment(project, payment_intent_id)
 
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
+    if success:
+        return JsonResponse({'success': True, 'message': 'Payment confirmed'})
+    return JsonResponse({'error': 'Payment confirmation failed'}, status=400)
 
 
 @require_admin
-def release_payment(request, project_id):
+@require_POST
+async def release_payment(request, project_id):
     """Release escrowed payment to analyst"""
-    project = get_object_or_404(Project, project_id=project_id)
-
-    if request.method == 'POST':
-        if project.status != 'completed':
-            return JsonResponse({'error': 'Project must be completed first'}, status=400)
+    project = await aget_object_or_404(payment_project_queryset(), project_id=project_id)
 
-        analyst_stripe_account = request.POST.get('analyst_stripe_account', '')
-        if not analyst_stripe_account:
-            return JsonResponse({'error': 'Analyst Stripe account not configured'}, status=400)
+    if project.status != Project.Status.COMPLETED:
+        return JsonResponse({'error': 'Project must be completed first'}, status=400)
 
-        success = StripePaymentManager.release_payment_to_analyst(project, analyst_stripe_account)
-        return JsonResponse({'success': success})
+    analyst_stripe_account = request.POST.get('analyst_stripe_account', '')
+    if not analyst_stripe_account:
+        return JsonResponse({'error': 'Analyst Stripe account not configured'}, status=400)
 
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
+    success = await StripePaymentManager.release_payment_to_analyst(project, analyst_stripe_account)
+    return JsonResponse({'success': success})
 
 
 @require_admin
-def refund_payment(request, project_id):
+@require_POST
+async def refund_payment(request, project_id):
     """Refund payment to client"""
-    project = get_object_or_404(Project, project_id=project_id)
+    project = await aget_object_or_404(payment_project_queryset(), project_id=project_id)
 
-    if request.method == 'POST':
-        reason = request.POST.get('reason', 'No reason provided')
-        success = StripePaymentManager.refund_payment(project, reason)
-
-        if success:
-            project.status = 'rejected'
-            project.save()
-            return JsonResponse({'success': True})
-        return JsonResponse({'error': 'Refund failed'}, status=400)
+    reason = request.POST.get('reason', 'No reason provided')
+    success = await StripePaymentManager.refund_payment(project, reason)
 
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
+    if success:
+        return JsonResponse({'success': True})
+    return JsonResponse({'error': 'Refund failed'}, status=400)
 
 
 @require_auth
 def payment_page(request, project_id):
     """Display Stripe payment page"""
-    project = get_object_or_404(Project, project_id=project_id)
-    if project.client.id != request.user.id:
-        return render(request, 'core/access_denied.html', status=403)
+    project = get_object_or_404(
+        Project.objects.only(*PAYMENT_PAGE_FIELDS), project_id=project_id, client_id=request.user.id,
+    )
 
     return render(request, 'core/payment.html', {
         'project': project,
-        'stripe_public_key': settings.STRIPE_PUBLIC_KEY,
+        'stripe_public_key': STRIPE_PUBLIC_KEY,
     })
 
 
 @require_auth
 def payment_success(request, project_id):
-    project = get_object_or_404(Project, project_id=project_id)
-    if project.client.id != request.user.id:
-        return render(request, 'core/access_denied.html', status=403)
+    project = get_object_or_404(
+        Project.objects.only(*PAYMENT_PAGE_FIELDS), project_id=project_id, client_id=request.user.id,
+    )
     return render(request, 'core/payment_success.html', {'project': project})
 
 
 @require_auth
 def payment_cancel(request, project_id):
-    project = get_object_or_404(Project, project_id=project_id)
-    if project.client.id != request.user.id:
-        return render(request, 'core/access_denied.html', status=403)
+    project = get_object_or_404(
+        Project.objects.only(*PAYMENT_PAGE_FIELDS), project_id=project_id, client_id=request.user.id,
+    )
     return render(request, 'core/payment_cancel.html', {'project': project})
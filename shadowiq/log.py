@@ -0,0 +1,35 @@
+"""
+Logging setup for ShadowIQ
+Handlers write from a background thread so log I/O never blocks a request
+"""
+
+import atexit
+import logging
+import logging.config
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def configure_logging(config):
+    """
+    Apply the LOGGING dict, then move the root logger's handlers behind a
+    QueueHandler drained by a QueueListener thread.
+    """
+    logging.config.dictConfig(config)
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener.start()
+    atexit.register(listener.stop)
+    # Threads do not survive fork; restart the listener in forked workers
+    os.register_at_fork(after_in_child=listener.start)
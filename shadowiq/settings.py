@@ -49,6 +49,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'shadowiq.wsgi.application'
+ASGI_APPLICATION = 'shadowiq.asgi.application'
 
 #DATABASES = {
  #   'default': {
@@ -68,6 +69,29 @@ DATABASES = {
     }
 }
 
+# Cache
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Celery
+CELERY_BROKER_URL = REDIS_URL
+CELERY_TASK_ALWAYS_EAGER = not REDIS_URL  # run tasks inline when no broker is configured
+CELERY_TASK_ROUTES = {
+    'core.tasks.send_magic_link_task': {'queue': 'email_queue'},
+}
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -91,7 +115,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Session configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'  # reads hit the cache, writes go through to the DB
 SESSION_COOKIE_AGE = 86400 * 7  # 7 days
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
@@ -122,6 +146,9 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 PROJECT_ID_PREFIX = 'SIQ'
 MAX_FILE_UPLOAD_SIZE = 500 * 1024 * 1024  # 500 MB
 DATA_RETENTION_DAYS = 180
+USER_CACHE_TTL = 300  # seconds a session's PseudonymousUser stays cached
+LAST_SEEN_INTERVAL = 60  # minimum seconds between last_seen writes
+DASHBOARD_PAGE_SIZE = 50  # projects per admin dashboard page
 
 # AWS S3 Configuration
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', '')
@@ -130,11 +157,17 @@ AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME', '')
 AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'us-east-1')
 AWS_S3_CUSTOM_DOMAIN = os.environ.get('AWS_S3_CUSTOM_DOMAIN', '')
 
+# ClamAV daemon socket used to scan uploads
+CLAMD_SOCKET = os.environ.get('CLAMD_SOCKET', '/var/run/clamav/clamd.ctl')
+
 # Stripe Configuration
 STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY', '')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
+MAX_PAYMENT_AMOUNT = 999999.99  # Stripe's per-charge ceiling for USD
 
 # Logging
+# Root handlers run on a QueueListener thread (see shadowiq.log)
+LOGGING_CONFIG = 'shadowiq.log.configure_logging'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,